@@ -1,4 +1,13 @@
+import json
+import os
+import tempfile
+import numpy as np
+import openpyxl
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
 import streamlit as st
 import time
 from io import BytesIO
@@ -16,35 +25,128 @@ def show_temporary_message(message, duration=3):
     time.sleep(duration)  # Esperar `duration` segundos
     placeholder.empty()  # Ocultar el mensaje
 
-# 1. Función para cargar datos con manejo de errores y caché
-@st.cache_data  # Almacena en caché el resultado de esta función
+# Columnas de CMDB.xlsx utilizadas por la app (el resto se descarta al cargar)
+NEEDED_COLS = [
+    "Hostname",
+    "Familia SO",
+    "Capacidad Primaria",
+    "Sistema operativo",
+    "Estado operativo",
+    "Entorno",
+    "Ubicación",
+    "IP de Administración",
+]
+
+# Columnas de CMDB.xlsx que se convierten a categóricas (filtros por código en lugar de texto)
+CATEGORY_COLS = [
+    "Familia SO",
+    "Capacidad Primaria",
+    "Sistema operativo",
+    "Estado operativo",
+    "Entorno",
+    "Ubicación",
+]
+
+# Columnas de CMDB.xlsx con filtro dinámico en la barra lateral
+FILTER_COLS = ["Sistema operativo", "Estado operativo", "Entorno", "Ubicación", "Hostname"]
+
+# Columnas de AzureArc.csv utilizadas por la app
+ARC_COLS = ["HOST NAME", "NAME", "ARC AGENT STATUS"]
+
+# Tipo de las columnas de texto: strings de Arrow, procesados en C++ en lugar de objetos de Python
+STRING_DTYPE = pd.ArrowDtype(pa.string())
+
+# Estados de ARC AGENT STATUS que indican que el servidor tiene el agente instalado
+STATUSES_WITH_AGENT = ("Connected", "Expired", "Offline")
+
+# Función para leer un Excel usando una copia Parquet como caché en disco
+def _cached_excel(path, sheet):
+    """
+    Lee la hoja `sheet` del archivo Excel `path`.
+    Si existe una copia `path + ".parquet"` generada a partir de este mismo Excel (fecha de modificación
+    y tamaño), con la misma hoja y columnas, la usa; en caso contrario lee el Excel y guarda la copia Parquet.
+    """
+    cache = path + ".parquet"
+    # Clave guardada en los metadatos del Parquet. Se compara por igualdad y no con ">=" sobre la fecha,
+    # porque copiar o descomprimir un Excel nuevo puede conservar una fecha de modificación más antigua
+    source = os.stat(path)
+    cache_key = json.dumps({
+        "sheet": sheet,
+        "columns": NEEDED_COLS,
+        "mtime_ns": source.st_mtime_ns,
+        "size": source.st_size,
+    }).encode("utf-8")
+    if os.path.exists(cache):
+        try:
+            # El memory map evita leer el archivo a un búfer intermedio (la descompresión sí genera búferes nuevos),
+            # y to_pandas envuelve esas columnas de Arrow sin convertirlas
+            table = pq.read_table(cache, memory_map=True)
+            if (table.schema.metadata or {}).get(b"cache_key") == cache_key:
+                return table.to_pandas(types_mapper=pd.ArrowDtype)
+        except (OSError, pa.ArrowException):
+            pass  # Copia dañada o ilegible: se descarta y se regenera desde el Excel
+
+    # Leer la hoja en modo solo lectura, tomando únicamente los valores de las columnas necesarias
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        worksheet = workbook[sheet]
+        worksheet.reset_dimensions()  # No confiar en la etiqueta <dimension>, algunos exportadores la dejan en "A1"
+        rows = worksheet.iter_rows(values_only=True)
+        header = next(rows)
+        positions = [i for i, col in enumerate(header) if col in NEEDED_COLS]
+        # Las filas pueden venir más cortas que el encabezado: completar con None
+        data = [[row[i] if i < len(row) else None for i in positions] for row in rows]
+    finally:
+        workbook.close()  # En modo solo lectura el archivo queda abierto hasta cerrarlo
+
+    df = pd.DataFrame(data, columns=[header[i] for i in positions], dtype=object)
+    df = df.dropna(how="all").reset_index(drop=True)  # Descartar filas vacías
+    # Pasar primero por "string" para convertir números, booleanos y fechas a texto conservando los nulos
+    df = df.astype("string").astype(STRING_DTYPE)
+    # Escribir en un archivo temporal de la misma carpeta y reemplazar al final, para que una
+    # escritura interrumpida (por ejemplo, disco lleno) nunca deje una copia truncada
+    tmp_cache = None
+    try:
+        fd, tmp_cache = tempfile.mkstemp(
+            prefix=os.path.basename(cache) + ".", suffix=".tmp", dir=os.path.dirname(cache) or "."
+        )
+        os.close(fd)
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        table = table.replace_schema_metadata({**(table.schema.metadata or {}), b"cache_key": cache_key})
+        pq.write_table(table, tmp_cache, compression="zstd")
+        os.replace(tmp_cache, cache)
+    except (OSError, pa.ArrowException):
+        pass  # Si no se puede escribir la caché, se sigue trabajando con el Excel
+    finally:
+        if tmp_cache is not None and os.path.exists(tmp_cache):
+            os.remove(tmp_cache)
+    return df
+
+# 1. Función para cargar datos con manejo de errores
+# Sin caché propia: get_base_data guarda el resultado y vuelve a intentar la carga si falló
 def load_data():
     """
     Carga los datos desde los archivos CMDB.xlsx y AzureArc.csv.
     Retorna dos DataFrames: df_cmdb y df_arc.
     """
     try:
-        # Cargar CMDB.xlsx con parámetros optimizados
-        df_cmdb = pd.read_excel(
-            "CMDB.xlsx",
-            sheet_name="INFRAESTRUCTURA",
-            engine="openpyxl",  # Usar openpyxl para archivos .xlsx
-            dtype={"Hostname": str}  # Especificar tipos de datos para mejorar la carga
-        )
+        # Cargar CMDB.xlsx (o su copia Parquet si está actualizada)
+        df_cmdb = _cached_excel("CMDB.xlsx", sheet="INFRAESTRUCTURA")
         show_temporary_message("Archivo CMDB.xlsx cargado correctamente.", duration=3)
     except Exception as e:
         st.exception(e)  # Muestra la traza completa del error
         return None, None
 
     try:
-        # Cargar AzureArc.csv con parámetros optimizados
+        # Cargar AzureArc.csv con el parser en C (mucho más rápido que el de Python)
         df_arc = pd.read_csv(
             "AzureArc.csv",
-            delimiter=",",
-            quotechar='"',
-            skipinitialspace=True,
-            engine="python",
-            dtype={"HOST NAME": str, "NAME": str}  # Especificar tipos de datos para mejorar la carga
+            engine="c",
+            skipinitialspace=True,  # Necesario para exportaciones con espacio después de la coma (pyarrow no lo soporta)
+            low_memory=False,
+            usecols=lambda col: col in ARC_COLS,  # Leer solo las columnas necesarias
+            dtype={col: STRING_DTYPE for col in ARC_COLS},  # Especificar tipos de datos para mejorar la carga
+            dtype_backend="pyarrow"
         )
         show_temporary_message("Archivo AzureArc.csv cargado correctamente.", duration=3)
     except Exception as e:
@@ -54,6 +156,7 @@ def load_data():
     return df_cmdb, df_arc
 
 # 2. Función para normalizar datos con validaciones
+# Sin caché propia: se ejecuta una sola vez dentro de get_base_data, sin serializar los DataFrames
 def normalize_data(df_cmdb, df_arc):
     """
     Normaliza las columnas relevantes en ambos DataFrames.
@@ -71,97 +174,182 @@ def normalize_data(df_cmdb, df_arc):
 
     # Combinar columnas "HOST NAME" y "NAME" en AzureArc.csv
     if "HOST NAME" in df_arc.columns and "NAME" in df_arc.columns:
-        df_arc["Hostname_combined"] = df_arc["HOST NAME"].fillna(df_arc["NAME"]).str.strip().str.lower()
+        # Usar "NAME" cuando "HOST NAME" esté vacío, operando directamente sobre los arrays de Arrow
+        host = pa.array(df_arc["HOST NAME"], type=pa.string())
+        name = pa.array(df_arc["NAME"], type=pa.string())
+        host = pc.if_else(pc.equal(host, ""), pa.scalar(None, type=pa.string()), host)
+        combined = pc.utf8_lower(pc.utf8_trim_whitespace(pc.coalesce(host, name)))
+        df_arc["Hostname_combined"] = pd.Series(pd.array(combined, dtype=STRING_DTYPE), index=df_arc.index)
     elif "NAME" in df_arc.columns:
         df_arc["Hostname_combined"] = df_arc["NAME"].str.strip().str.lower()
+    else:
+        df_arc["Hostname_combined"] = df_arc["HOST NAME"].str.strip().str.lower()
 
     # Normalizar la columna "Hostname" en CMDB
     df_cmdb["Hostname"] = df_cmdb["Hostname"].str.strip().str.lower()
 
     # Limpiar valores en ARC AGENT STATUS
     if "ARC AGENT STATUS" in df_arc.columns:
-        df_arc["ARC AGENT STATUS"] = df_arc["ARC AGENT STATUS"].astype(str).str.strip()
+        df_arc["ARC AGENT STATUS"] = df_arc["ARC AGENT STATUS"].str.strip()
+
+    # Convertir a categóricas las columnas de CMDB con pocos valores distintos
+    for col in CATEGORY_COLS:
+        if col in df_cmdb.columns:
+            df_cmdb[col] = df_cmdb[col].astype("category")
+
+    # Indexar AzureArc por hostname (único y no nulo) para que el cruce use la búsqueda por índice;
+    # sin nombre no hay con qué cruzar, y un nulo coincidiría con los servidores de CMDB sin Hostname
+    df_arc = (
+        df_arc.dropna(subset=["Hostname_combined"])
+        .drop_duplicates("Hostname_combined")
+        .set_index("Hostname_combined")
+    )
 
     return df_cmdb, df_arc
 
+# Función para buscar un texto en una columna categórica
+def _category_contains(series, text):
+    """
+    Retorna una máscara booleana con las filas cuya categoría contiene `text` (sin distinguir mayúsculas).
+    La búsqueda se hace sobre las categorías y luego se traduce a filas por código, no fila por fila.
+    """
+    categories = series.cat.categories.astype(str).str.lower()
+    matching = np.asarray(categories.str.contains(text.lower(), regex=False), dtype=bool)
+    # Los valores nulos tienen código -1, que apunta al False agregado al final
+    return np.append(matching, False)[series.cat.codes.to_numpy()]
+
 # 3. Función para aplicar filtros preconfigurados
-@st.cache_data  # Almacena en caché el resultado de esta función
+# Sin caché propia: se ejecuta una sola vez dentro de get_base_data
 def apply_filters(df_cmdb):
     """
     Aplica filtros preconfigurados al DataFrame df_cmdb.
     Retorna el DataFrame filtrado.
     """
     try:
-        df_cmdb_filtered = df_cmdb[
-            (df_cmdb["Familia SO"].str.contains("Windows", case=False, na=False)) &
-            (df_cmdb["Capacidad Primaria"].str.contains("Servidor", case=False, na=False))
-        ]
+        mask = (
+            _category_contains(df_cmdb["Familia SO"], "Windows") &
+            _category_contains(df_cmdb["Capacidad Primaria"], "Servidor")
+        )
+        df_cmdb_filtered = df_cmdb[mask]
         return df_cmdb_filtered
     except KeyError as e:
         st.error(f"Error: No se encontró la columna {e} en CMDB.xlsx.")
         st.stop()
 
-# 4. Función para aplicar filtros dinámicos
-def apply_dynamic_filters(df_cmdb_filtered):
+# Función para obtener los datos base de la app
+@st.cache_resource(show_spinner=False, validate=lambda data: data[0] is not None)  # Se comparte sin copiar entre ejecuciones
+def get_base_data():
     """
-    Aplica filtros dinámicos basados en la selección del usuario.
-    Retorna el DataFrame filtrado.
+    Carga, normaliza y aplica los filtros preconfigurados una sola vez.
+    Si la carga falla, el resultado no se reutiliza y se vuelve a intentar en la siguiente ejecución.
+    Retorna df_cmdb_filtered y df_arc, o (None, None) si no se pudieron cargar los datos.
+    Los DataFrames retornados son compartidos: no deben modificarse.
+    """
+    df_cmdb, df_arc = load_data()
+    if df_cmdb is None or df_arc is None:
+        return None, None
+    df_cmdb, df_arc = normalize_data(df_cmdb, df_arc)
+    return apply_filters(df_cmdb), df_arc
+
+# Función para obtener las opciones de los filtros dinámicos
+@st.cache_data(show_spinner=False)  # Almacena en caché el resultado de esta función
+def get_filter_options():
+    """
+    Calcula los valores disponibles para cada filtro dinámico, antes de aplicar ningún filtro.
+    Los nulos se descartan de los valores únicos, sin copiar la columna completa.
+    Retorna un diccionario {columna: lista de valores}.
+    """
+    df_cmdb_filtered, _ = get_base_data()
+    return {
+        col: [value for value in df_cmdb_filtered[col].unique().tolist() if not pd.isna(value)]
+        for col in FILTER_COLS
+    }
+
+# 4. Función para seleccionar los filtros dinámicos
+def select_dynamic_filters():
+    """
+    Muestra los filtros dinámicos en la barra lateral.
+    Retorna las selecciones del usuario como tuplas, para usarlas como clave de caché.
     """
     st.sidebar.markdown("### Filtros dinámicos")
+    options = get_filter_options()
+
+    sistema_operativo = st.sidebar.multiselect("Seleccionar Sistema Operativo", options=options["Sistema operativo"])
+    estado_operativo = st.sidebar.multiselect("Seleccionar Estado Operativo", options=options["Estado operativo"])
+    entorno = st.sidebar.multiselect("Seleccionar Entorno", options=options["Entorno"])
+    ubicacion_excluir = st.sidebar.multiselect("Seleccionar Ubicaciones a excluir", options=options["Ubicación"])
+    hostname_excluir = st.sidebar.multiselect("Seleccionar servidor a excluir", options=options["Hostname"])
+
+    return (
+        tuple(sistema_operativo),
+        tuple(estado_operativo),
+        tuple(entorno),
+        tuple(ubicacion_excluir),
+        tuple(hostname_excluir),
+    )
+
+# Función para aplicar filtros dinámicos
+def apply_dynamic_filters(df_cmdb_filtered, sistema_operativo, estado_operativo, entorno, ubicacion_excluir, hostname_excluir):
+    """
+    Aplica los filtros dinámicos seleccionados por el usuario.
+    Retorna el DataFrame filtrado.
+    """
+    mask = np.ones(len(df_cmdb_filtered), dtype=bool)  # Máscara combinada, se aplica una sola vez al final
 
     # Filtro por Sistema Operativo
-    sistema_operativo_options = df_cmdb_filtered["Sistema operativo"].dropna().unique().tolist()
-    sistema_operativo = st.sidebar.multiselect("Seleccionar Sistema Operativo", options=sistema_operativo_options)
     if sistema_operativo:
-        df_cmdb_filtered = df_cmdb_filtered[df_cmdb_filtered["Sistema operativo"].isin(sistema_operativo)]
+        mask &= df_cmdb_filtered["Sistema operativo"].isin(sistema_operativo).to_numpy(dtype=bool)
 
     # Filtro por Estado Operativo
-    estado_operativo_options = df_cmdb_filtered["Estado operativo"].dropna().unique().tolist()
-    estado_operativo = st.sidebar.multiselect("Seleccionar Estado Operativo", options=estado_operativo_options)
     if estado_operativo:
-        df_cmdb_filtered = df_cmdb_filtered[df_cmdb_filtered["Estado operativo"].isin(estado_operativo)]
+        mask &= df_cmdb_filtered["Estado operativo"].isin(estado_operativo).to_numpy(dtype=bool)
 
     # Filtro por Entorno
-    entorno_options = df_cmdb_filtered["Entorno"].dropna().unique().tolist()
-    entorno = st.sidebar.multiselect("Seleccionar Entorno", options=entorno_options)
     if entorno:
-        df_cmdb_filtered = df_cmdb_filtered[df_cmdb_filtered["Entorno"].isin(entorno)]
+        mask &= df_cmdb_filtered["Entorno"].isin(entorno).to_numpy(dtype=bool)
 
     # Filtro por Ubicación (excluyente)
-    ubicacion_options = df_cmdb_filtered["Ubicación"].dropna().unique().tolist()
-    ubicacion_excluir = st.sidebar.multiselect("Seleccionar Ubicaciones a excluir", options=ubicacion_options)
     if ubicacion_excluir:
-        df_cmdb_filtered = df_cmdb_filtered[~df_cmdb_filtered["Ubicación"].isin(ubicacion_excluir)]
+        mask &= ~df_cmdb_filtered["Ubicación"].isin(ubicacion_excluir).to_numpy(dtype=bool)
 
     # Filtro por Hostname (excluyente)
-    hostname_options = df_cmdb_filtered["Hostname"].dropna().unique().tolist()
-    hostname_excluir = st.sidebar.multiselect("Seleccionar servidor a excluir", options=hostname_options)
     if hostname_excluir:
-        df_cmdb_filtered = df_cmdb_filtered[~df_cmdb_filtered["Hostname"].isin(hostname_excluir)]
+        mask &= ~df_cmdb_filtered["Hostname"].isin(hostname_excluir).to_numpy(dtype=bool)
 
-    return df_cmdb_filtered
+    return df_cmdb_filtered[mask]
 
 # 5. Función para cruzar datos (merge)
-@st.cache_data  # Almacena en caché el resultado de esta función
 def merge_data(df_cmdb_filtered, df_arc):
     """
-    Realiza el cruce (merge) entre df_cmdb_filtered y df_arc.
+    Realiza el cruce (merge) entre df_cmdb_filtered y df_arc, indexado por hostname.
+    Solo se cruzan las columnas que se muestran en los resultados.
     Retorna el DataFrame combinado.
     """
     try:
-        df_merged = pd.merge(
-            df_cmdb_filtered,
-            df_arc,
-            left_on="Hostname",
-            right_on="Hostname_combined",
+        df_merged = df_cmdb_filtered[["Hostname", "IP de Administración"]].join(
+            df_arc[["ARC AGENT STATUS"]],
+            on="Hostname",
             how="left",
-            suffixes=("_cmdb", "_arc")
+            rsuffix="_arc"
         )
         return df_merged
     except Exception as e:
         st.error(f"Error al realizar el cruce de datos: {e}")
         st.stop()
 
+# Función para filtrar y cruzar datos, en caché según los filtros seleccionados
+@st.cache_data(show_spinner=False)  # La clave de caché son las tuplas de selección, no los DataFrames
+def filter_and_merge(sistema_operativo, estado_operativo, entorno, ubicacion_excluir, hostname_excluir):
+    """
+    Aplica los filtros dinámicos sobre los datos base y realiza el cruce con AzureArc.
+    Retorna el DataFrame combinado.
+    """
+    df_cmdb_filtered, df_arc = get_base_data()
+    df_cmdb_filtered = apply_dynamic_filters(
+        df_cmdb_filtered, sistema_operativo, estado_operativo, entorno, ubicacion_excluir, hostname_excluir
+    )
+    return merge_data(df_cmdb_filtered, df_arc)
+
 # 6. Función para exportar datos a Excel
 def export_to_excel(df_with_agent, df_without_agent):
     """
@@ -169,7 +357,12 @@ def export_to_excel(df_with_agent, df_without_agent):
     Retorna un objeto BytesIO con el archivo en memoria.
     """
     output = BytesIO()  # Crear un buffer en memoria
-    with pd.ExcelWriter(output, engine="xlsxwriter") as writer:
+    # No se usa constant_memory: pandas escribe las celdas por columna y ese modo exige escribir por fila
+    with pd.ExcelWriter(
+        output,
+        engine="xlsxwriter",
+        engine_kwargs={"options": {"strings_to_urls": False}}  # Evita analizar cada celda buscando URLs
+    ) as writer:
         df_with_agent.to_excel(writer, sheet_name="Con Agente", index=False)
         df_without_agent.to_excel(writer, sheet_name="Sin Agente", index=False)
     output.seek(0)  # Posicionar el cursor al inicio del buffer
@@ -183,19 +376,33 @@ def export_to_csv(df_with_agent, df_without_agent):
     """
     output = BytesIO()  # Crear un buffer en memoria
     with zipfile.ZipFile(output, "w") as zipf:
-        # Exportar "Servidores con agente" a CSV
-        csv_buffer_agent = BytesIO()
-        df_with_agent.to_csv(csv_buffer_agent, index=False)
-        zipf.writestr("servidores_con_agente.csv", csv_buffer_agent.getvalue())
+        # Exportar "Servidores con agente" a CSV, escribiendo directo dentro del ZIP
+        with zipf.open("servidores_con_agente.csv", "w") as csv_file:
+            pacsv.write_csv(pa.Table.from_pandas(df_with_agent, preserve_index=False), csv_file)
 
         # Exportar "Servidores sin agente" a CSV
-        csv_buffer_no_agent = BytesIO()
-        df_without_agent.to_csv(csv_buffer_no_agent, index=False)
-        zipf.writestr("servidores_sin_agente.csv", csv_buffer_no_agent.getvalue())
+        with zipf.open("servidores_sin_agente.csv", "w") as csv_file:
+            pacsv.write_csv(pa.Table.from_pandas(df_without_agent, preserve_index=False), csv_file)
 
     output.seek(0)  # Posicionar el cursor al inicio del buffer
     return output
 
+# Función para construir el gráfico de torta
+@st.cache_resource(show_spinner=False)  # Reutiliza la figura si los conteos no cambian
+def build_agent_pie(with_agent, without_agent):
+    """
+    Construye el gráfico de torta con el porcentaje de servidores con y sin agente.
+    Retorna la figura de Plotly.
+    """
+    fig = px.pie(
+        values=[with_agent, without_agent],
+        names=["Con Agente", "Sin Agente"],
+        title="Porcentaje de Servidores con y sin Agente",
+        color_discrete_sequence=["#1f77b4","#ff7f0e"]
+    )
+    fig.update_traces(textfont_size=16)
+    return fig
+
 # 8. Función para mostrar resultados
 def show_results(df_merged):
     """
@@ -214,10 +421,9 @@ def show_results(df_merged):
     )
 
 
-    # Identificar servidores con agente
-    statuses_with_agent = ["Connected", "Expired", "Offline"]
-    df_merged["Tiene_Agente"] = df_merged["ARC AGENT STATUS"].isin(statuses_with_agent)
-    with_agent = df_merged["Tiene_Agente"].sum()
+    # Identificar servidores con agente (máscara local, sin agregar columnas a df_merged)
+    mask = df_merged["ARC AGENT STATUS"].isin(STATUSES_WITH_AGENT).to_numpy(dtype=bool)
+    with_agent = int(mask.sum())
     without_agent = len(df_merged) - with_agent
     compliance_percentage = (with_agent / len(df_merged)) * 100 if len(df_merged) > 0 else 0
 
@@ -235,23 +441,17 @@ def show_results(df_merged):
 
     # Gráfico de torta para mostrar el porcentaje de servidores con y sin agente
     st.markdown("")
-    fig = px.pie(
-        values=[with_agent, without_agent],
-        names=["Con Agente", "Sin Agente"],
-        title="Porcentaje de Servidores con y sin Agente",
-        color_discrete_sequence=["#1f77b4","#ff7f0e"]
-    )
-    fig.update_traces(textfont_size=16)
-    st.plotly_chart(fig)
+    with st.expander("Gráfico de distribución", expanded=False):
+        st.plotly_chart(build_agent_pie(with_agent, without_agent), width="stretch")
 
     # Detalle del estado de los agentes
     st.markdown("### Estado de los Servidores con Agente")
-    df_merged["ARC AGENT STATUS"] = df_merged["ARC AGENT STATUS"].fillna("No Instalado / No aplica")
-    agent_status_counts = df_merged["ARC AGENT STATUS"].value_counts(dropna=False).to_dict()
-    df_agent_status = pd.DataFrame.from_dict(agent_status_counts, orient="index", columns=["Cantidad"])
-    df_agent_status.index.name = "Status Azure Arc"
-    df_agent_status.reset_index(inplace=True)
-    df_agent_status = df_agent_status[["Status Azure Arc","Cantidad"]]
+    statuses = pa.array(df_merged["ARC AGENT STATUS"].fillna("No Instalado / No aplica"), type=pa.string())
+    agent_status_counts = pc.value_counts(statuses)  # Conteo vectorizado en Arrow
+    df_agent_status = pd.DataFrame({
+        "Status Azure Arc": agent_status_counts.field("values").to_pylist(),
+        "Cantidad": agent_status_counts.field("counts").to_pylist()
+    }).sort_values("Cantidad", ascending=False, kind="stable")
     st.dataframe(df_agent_status, hide_index=True, use_container_width=True)
 
     # Mostrar tablas de detalles una al lado de la otra
@@ -260,16 +460,15 @@ def show_results(df_merged):
 
     with col1:
         st.markdown("#### Servidores con Agente")
-        df_with_agent = df_merged[df_merged["Tiene_Agente"]].copy()
-        df_with_agent["ARC AGENT STATUS"] = df_with_agent["ARC AGENT STATUS"].fillna("No disponible")
-        df_with_agent_filtered = df_with_agent[["Hostname", "IP de Administración", "ARC AGENT STATUS"]]
-        st.dataframe(df_with_agent_filtered, hide_index=True, use_container_width=True)
+        df_with_agent = df_merged.loc[mask, ["Hostname", "IP de Administración", "ARC AGENT STATUS"]].assign(
+            **{"ARC AGENT STATUS": lambda df: df["ARC AGENT STATUS"].fillna("No disponible")}
+        )
+        st.dataframe(df_with_agent, hide_index=True, use_container_width=True)
 
     with col2:
         st.markdown("#### Servidores sin Agente")
-        df_without_agent = df_merged[~df_merged["Tiene_Agente"]].copy()
-        df_without_agent_filtered = df_without_agent[["Hostname", "IP de Administración"]]
-        st.dataframe(df_without_agent_filtered, hide_index=True, use_container_width=True)
+        df_without_agent = df_merged.loc[~mask, ["Hostname", "IP de Administración"]]
+        st.dataframe(df_without_agent, hide_index=True, use_container_width=True)
 
     # Botón para exportar resultados
     st.markdown("### Exportar Resultados")
@@ -307,24 +506,18 @@ def main():
         unsafe_allow_html=True
     )
 
-    # Cargar datos
-    df_cmdb, df_arc = load_data()
-    if df_cmdb is None or df_arc is None:
+    # Cargar, normalizar y aplicar filtros preconfigurados (una sola vez para toda la app)
+    df_cmdb_filtered, df_arc = get_base_data()
+    if df_cmdb_filtered is None or df_arc is None:
         st.warning("No se pudieron cargar los datos. Por favor, revisa los archivos e intenta nuevamente.")
         return
     st.title("Análisis de Servidores con Azure Arc")
-    
-    # Normalizar datos
-    df_cmdb, df_arc = normalize_data(df_cmdb, df_arc)
-
-    # Aplicar filtros preconfigurados
-    df_cmdb_filtered = apply_filters(df_cmdb)
 
-    # Aplicar filtros dinámicos
-    df_cmdb_filtered = apply_dynamic_filters(df_cmdb_filtered)
+    # Seleccionar filtros dinámicos
+    selections = select_dynamic_filters()
 
-    # Cruce de datos
-    df_merged = merge_data(df_cmdb_filtered, df_arc)
+    # Aplicar filtros dinámicos y cruzar datos
+    df_merged = filter_and_merge(*selections)
 
     # Mostrar resultados
     show_results(df_merged)